@@ -13,6 +13,9 @@ class Settings(BaseSettings):
     # Frontend build directory relative to project root
     FRONTEND_DIR: str = os.path.join(PROJECT_ROOT, 'dist')
 
+    # Serve the frontend from memory with br/gzip variants and immutable caching of hashed assets
+    FRONTEND_PRECOMPRESSED: bool = True
+
     # Database settings
     DATABASE_URL: str = "sqlite:///./app/database.db"
 
@@ -35,6 +35,22 @@ class ScheduledTask(Base):
     def __repr__(self):
         return f"<ScheduledTask(id={self.id}, name='{self.name}', status='{self.status}')>"
 
+class ScheduledPipeline(Base):
+    __tablename__ = "scheduled_pipelines"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, index=True)
+    steps = Column(Text) # JSON list of {"endpoint", "codebases", "commit_id"}, run in order
+    schedule_time = Column(DateTime)
+    status = Column(String, default="pending") # pending, running, completed, failed, missed
+    last_run = Column(DateTime, nullable=True)
+    run_count = Column(Integer, default=0)
+    step_timings = Column(Text, nullable=True) # JSON list of per-step results from the last run
+    job_id = Column(String, unique=True, nullable=True) # APScheduler job ID
+
+    def __repr__(self):
+        return f"<ScheduledPipeline(id={self.id}, name='{self.name}', status='{self.status}')>"
+
 def init_db():
     """Initializes the database by creating all tables."""
     print("Creating database tables...")
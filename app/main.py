@@ -1,5 +1,8 @@
 import os
+import json
 import uvicorn
+from datetime import datetime
+from typing import List, Optional
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
@@ -12,7 +15,8 @@ from sqlalchemy.orm import Session
 from .config import settings
 from .database import init_db, SessionLocal
 from .docker_manager import DockerManager
-from .task_manager import TaskManager
+from .task_manager import PipelineRunningError, TaskManager
+from .static_files import PrecompressedStaticFiles
 from . import scheduler # Import scheduler directly for start/shutdown
 
 # Initialize DockerManager globally as it doesn't directly depend on a DB session per request
@@ -69,15 +73,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Serve static files for the frontend (React build)
-# This must be mounted last to prevent conflicts with API routes
-if os.path.exists(settings.FRONTEND_DIR):
-    print(f"Serving frontend from: {settings.FRONTEND_DIR}")
-    app.mount("/", StaticFiles(directory=settings.FRONTEND_DIR, html=True), name="frontend")
-else:
-    print(f"Warning: Frontend build directory not found at {settings.FRONTEND_DIR}")
-    print("Please run 'npm run build' in the frontend directory.")
-
 # Pydantic models for request body validation
 class DirNameRequest(BaseModel):
     dir_name: str
@@ -90,6 +85,29 @@ class StopProcessRequest(BaseModel):
     dir_name: str
     ides: bool = False
 
+class PipelineStep(BaseModel):
+    endpoint: str
+    codebases: List[str]
+    commit_id: Optional[str] = None
+
+class PipelineRequest(BaseModel):
+    name: str
+    schedule_time: datetime
+    steps: List[PipelineStep]
+
+def pipeline_to_dict(pipeline):
+    """Serializes a ScheduledPipeline row, decoding its JSON columns."""
+    return {
+        "id": pipeline.id,
+        "name": pipeline.name,
+        "steps": json.loads(pipeline.steps),
+        "schedule_time": pipeline.schedule_time.isoformat() if pipeline.schedule_time else None,
+        "status": pipeline.status,
+        "last_run": pipeline.last_run.isoformat() if pipeline.last_run else None,
+        "run_count": pipeline.run_count,
+        "step_timings": json.loads(pipeline.step_timings) if pipeline.step_timings else None,
+    }
+
 # API Endpoints: Each endpoint creates a TaskManager instance with a new DB session
 # and the global DockerManager instance.
 @app.post("/execute_codebase")
@@ -144,3 +162,53 @@ async def upload_image(file: UploadFile = File(...), db: Session = Depends(get_d
         return JSONResponse(content=result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {e}")
+
+@app.post("/scheduled_pipelines")
+async def add_scheduled_pipeline(request: PipelineRequest, db: Session = Depends(get_db)):
+    """Schedule an ordered, multi-step pipeline that runs as one unit."""
+    task_manager = TaskManager(db, docker_manager_instance)
+    try:
+        pipeline = task_manager.add_scheduled_pipeline(
+            request.name,
+            [step.model_dump() for step in request.steps],
+            request.schedule_time
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to schedule pipeline: {e}")
+    return JSONResponse(content=pipeline_to_dict(pipeline))
+
+@app.get("/scheduled_pipelines")
+async def list_scheduled_pipelines(db: Session = Depends(get_db)):
+    """List scheduled pipelines along with per-step timings from their last run."""
+    task_manager = TaskManager(db, docker_manager_instance)
+    pipelines = task_manager.get_scheduled_pipelines()
+    return JSONResponse(content=[pipeline_to_dict(pipeline) for pipeline in pipelines])
+
+@app.delete("/scheduled_pipelines/{pipeline_id}")
+async def delete_scheduled_pipeline(pipeline_id: int, db: Session = Depends(get_db)):
+    """Delete a scheduled pipeline and its pending job."""
+    task_manager = TaskManager(db, docker_manager_instance)
+    try:
+        deleted = task_manager.delete_scheduled_pipeline(pipeline_id)
+    except PipelineRunningError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Scheduled pipeline {pipeline_id} not found")
+    return JSONResponse(content={"message": f"Scheduled pipeline {pipeline_id} deleted"})
+
+def frontend_static_files(directory: str) -> StaticFiles:
+    """Builds the static file app for the frontend, honouring FRONTEND_PRECOMPRESSED."""
+    if settings.FRONTEND_PRECOMPRESSED:
+        return PrecompressedStaticFiles(directory=directory, html=True)
+    return StaticFiles(directory=directory, html=True)
+
+# Serve static files for the frontend (React build)
+# This must be mounted last to prevent conflicts with API routes
+if os.path.exists(settings.FRONTEND_DIR):
+    print(f"Serving frontend from: {settings.FRONTEND_DIR}")
+    app.mount("/", frontend_static_files(settings.FRONTEND_DIR), name="frontend")
+else:
+    print(f"Warning: Frontend build directory not found at {settings.FRONTEND_DIR}")
+    print("Please run 'npm run build' in the frontend directory.")
@@ -1,7 +1,9 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.executors.pool import ThreadPoolExecutor
+import json
 from datetime import datetime
+from typing import Optional
 
 from app.config import settings
 from app import database
@@ -63,6 +65,8 @@ def start_scheduler(task_manager):
                     print(f"Removing orphaned job ID {task.job_id} for task {task.id}")
                     task.job_id = None
                     db.add(task)
+
+        restore_pipelines(db)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -70,6 +74,54 @@ def start_scheduler(task_manager):
     finally:
         db.close()
 
+def restore_pipelines(db):
+    """Brings scheduled pipelines back in line with the scheduler after a restart."""
+    now = datetime.now()
+    for pipeline in db.query(database.ScheduledPipeline).all():
+        if pipeline.status == "running":
+            # The process died mid-run. Re-running half a deploy is unsafe, so record the interruption.
+            interrupt_pipeline(pipeline)
+            print(f"Pipeline {pipeline.name} (ID: {pipeline.id}) was interrupted by a restart; marked as failed")
+        elif pipeline.status == "pending" and pipeline.schedule_time and pipeline.schedule_time > now:
+            try:
+                job = scheduler.add_job(
+                    "app.task_manager:run_scheduled_pipeline", # Referenced by name; see PIPELINE_JOB_FUNC
+                    'date',
+                    run_date=pipeline.schedule_time,
+                    args=[pipeline.id],
+                    id=pipeline_job_id(pipeline.id),
+                    replace_existing=True
+                )
+                pipeline.job_id = job.id
+                db.add(pipeline)
+                print(f"Rescheduled pipeline {pipeline.name} (ID: {pipeline.id}) for {pipeline.schedule_time}")
+                continue
+            except Exception as e:
+                print(f"Error rescheduling pipeline {pipeline.name} (ID: {pipeline.id}): {e}")
+                pipeline.status = "failed"
+        elif pipeline.status == "pending":
+            # Its run time passed while the app was down; APScheduler would drop the misfired job anyway
+            pipeline.status = "missed"
+            print(f"Pipeline {pipeline.name} (ID: {pipeline.id}) missed its run at {pipeline.schedule_time}")
+
+        # Completed, failed and missed pipelines have nothing left to run
+        if pipeline.job_id:
+            if scheduler.get_job(pipeline.job_id):
+                remove_scheduled_job(pipeline.job_id)
+            pipeline.job_id = None
+        db.add(pipeline)
+
+def interrupt_pipeline(pipeline):
+    """Marks a pipeline that stopped mid-run as failed, along with its unfinished steps."""
+    pipeline.status = "failed"
+    if pipeline.step_timings:
+        step_timings = json.loads(pipeline.step_timings)
+        for timing in step_timings:
+            if timing.get("status") == "running":
+                timing["status"] = "failed"
+                timing["error"] = "Interrupted by application restart"
+        pipeline.step_timings = json.dumps(step_timings)
+
 def shutdown_scheduler():
     """Shuts down the APScheduler."""
     if scheduler.running:
@@ -77,7 +129,11 @@ def shutdown_scheduler():
         scheduler.shutdown()
         print("APScheduler shut down.")
 
-def add_scheduled_job(task_id: int, run_date: datetime, task_func, *args, **kwargs):
+def pipeline_job_id(pipeline_id: int) -> str:
+    """Returns the APScheduler job ID for a pipeline, kept apart from plain task IDs."""
+    return f"pipeline-{pipeline_id}"
+
+def add_scheduled_job(task_id: int, run_date: datetime, task_func, *args, job_id: Optional[str] = None, **kwargs):
     """Adds a new job to the scheduler."""
     try:
         job = scheduler.add_job(
@@ -85,7 +141,7 @@ def add_scheduled_job(task_id: int, run_date: datetime, task_func, *args, **kwar
             'date',
             run_date=run_date,
             args=[task_id, *args],
-            id=str(task_id), # Use task ID as job ID
+            id=job_id or str(task_id), # Use task ID as job ID unless one is given
             replace_existing=True, # Overwrite if a job with this ID already exists
             **kwargs
         )
@@ -0,0 +1,195 @@
+import gzip
+import hashlib
+import os
+import re
+import stat
+import threading
+from email.utils import formatdate
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# Vite emits hashed bundle files as assets/<name>-<8 char hash>.<ext>
+HASHED_ASSET_PATTERN = re.compile(r"(^|/)assets/.+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# index.html and other unhashed files must be revalidated so new deploys are picked up
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Prebuilt sibling files, in order of preference
+PRECOMPRESSED_VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+COMPRESSIBLE_MEDIA_TYPES = ("application/javascript", "application/json", "image/svg+xml", "application/wasm")
+MIN_COMPRESS_SIZE = 1024
+
+
+def fresh_variant_stat(variant_path: str, source_stat: os.stat_result):
+    """Stats a prebuilt variant, ignoring it if missing or left over from an older build of its source."""
+    try:
+        variant_stat = os.stat(variant_path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(variant_stat.st_mode) or variant_stat.st_mtime < source_stat.st_mtime:
+        return None
+    return variant_stat
+
+
+def cache_control_for(relative_path: str) -> str:
+    """Hashed bundle files never change under the same name; everything else must be revalidated."""
+    return IMMUTABLE_CACHE_CONTROL if HASHED_ASSET_PATTERN.search(relative_path) else REVALIDATE_CACHE_CONTROL
+
+
+class _CachedFile:
+    """A static file held in memory together with its compressed variants."""
+
+    def __init__(self, full_path: str, stat_result: os.stat_result):
+        with open(full_path, "rb") as f:
+            self.body = f.read()
+        self.mtime = stat_result.st_mtime
+        self.size = stat_result.st_size
+        self.media_type = guess_type(full_path)[0] or "text/plain"
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.etag = hashlib.md5(self.body, usedforsecurity=False).hexdigest()
+        self.variants = {}
+
+        for encoding, suffix in PRECOMPRESSED_VARIANTS:
+            variant_path = full_path + suffix
+            if fresh_variant_stat(variant_path, stat_result):
+                with open(variant_path, "rb") as f:
+                    self.variants[encoding] = f.read()
+
+        # No prebuilt gzip variant: compress once here rather than on every request
+        if "gzip" not in self.variants and self._is_compressible():
+            self.variants["gzip"] = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+        # Drop variants that do not actually save bytes
+        self.variants = {
+            encoding: body for encoding, body in self.variants.items() if len(body) < len(self.body)
+        }
+
+    def _is_compressible(self) -> bool:
+        if len(self.body) < MIN_COMPRESS_SIZE:
+            return False
+        return self.media_type.startswith("text/") or self.media_type in COMPRESSIBLE_MEDIA_TYPES
+
+    def is_stale(self, stat_result: os.stat_result) -> bool:
+        return stat_result.st_mtime != self.mtime or stat_result.st_size != self.size
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Returns the quality value of each content coding listed in an Accept-Encoding header."""
+    qualities = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def accepts_encoding(qualities: dict, encoding: str) -> bool:
+    """An encoding is accepted if listed with q > 0, or covered by '*' without its own q=0."""
+    if encoding in qualities:
+        return qualities[encoding] > 0
+    return qualities.get("*", 0) > 0
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves the frontend bundle from memory, picks br/gzip variants
+    by Accept-Encoding and marks hashed asset files as immutable.
+    """
+
+    def __init__(self, *args, max_cached_file_size: int = 10 * 1024 * 1024, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_cached_file_size = max_cached_file_size
+        self.cache = {}
+        self._cache_lock = threading.Lock()
+
+    def lookup_path(self, path: str):
+        # lookup_path runs in a worker thread, so disk reads for the cache happen here
+        # instead of blocking the event loop in file_response.
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result and stat.S_ISREG(stat_result.st_mode) and stat_result.st_size <= self.max_cached_file_size:
+            cached = self.cache.get(full_path)
+            if cached is None or cached.is_stale(stat_result):
+                with self._cache_lock:
+                    # A miss usually means a new build landed; drop files it replaced
+                    self._prune_cache()
+                    self.cache[full_path] = _CachedFile(full_path, stat_result)
+        elif full_path in self.cache:
+            with self._cache_lock:
+                self.cache.pop(full_path, None)
+        return full_path, stat_result
+
+    def _prune_cache(self):
+        for full_path, cached in list(self.cache.items()):
+            try:
+                current = os.stat(full_path)
+            except OSError:
+                current = None
+            if current is None or cached.is_stale(current) or current.st_size > self.max_cached_file_size:
+                del self.cache[full_path]
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        qualities = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+        relative_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        headers = {
+            "cache-control": cache_control_for(relative_path),
+            "vary": "Accept-Encoding",
+        }
+
+        cached = self.cache.get(full_path)
+        if cached is None or cached.is_stale(stat_result):
+            return self._disk_file_response(full_path, stat_result, request_headers, qualities, headers, status_code)
+
+        encoding = next(
+            (name for name, _ in PRECOMPRESSED_VARIANTS if name in cached.variants and accepts_encoding(qualities, name)),
+            None
+        )
+        body = cached.variants[encoding] if encoding else cached.body
+
+        headers["etag"] = f'"{cached.etag}-{encoding}"' if encoding else f'"{cached.etag}"'
+        headers["last-modified"] = cached.last_modified
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        if status_code == 200 and self.is_not_modified(Headers(headers), request_headers):
+            return NotModifiedResponse(Headers(headers))
+        return Response(body, status_code=status_code, headers=headers, media_type=cached.media_type)
+
+    def _disk_file_response(self, full_path, stat_result, request_headers, qualities, headers, status_code) -> Response:
+        """Streams a file too large to cache, still preferring a prebuilt variant on disk."""
+        path, path_stat = full_path, stat_result
+        for encoding, suffix in PRECOMPRESSED_VARIANTS:
+            if not accepts_encoding(qualities, encoding):
+                continue
+            variant_stat = fresh_variant_stat(full_path + suffix, stat_result)
+            if variant_stat:
+                path, path_stat = full_path + suffix, variant_stat
+                headers["content-encoding"] = encoding
+                break
+
+        # FileResponse derives the ETag from the stat of whichever file is sent, so each variant gets its own
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=path_stat,
+            headers=headers,
+            media_type=guess_type(full_path)[0] or "text/plain"
+        )
+        if status_code == 200 and self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,20 +1,36 @@
+import asyncio
+import json
+import time
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import ObjectDeletedError, StaleDataError
 
 from app import database, scheduler
 from app.docker_manager import DockerManager
 
+class PipelineRunningError(Exception):
+    """Raised when an operation is not allowed while a pipeline is executing."""
+
 class TaskManager:
     """Manages execution of various tasks, interacting with Docker and the database."""
 
-    def __init__(self, db_session: Session):
+    # Endpoints a scheduled task or pipeline step may target, mapped to the blocking action they run
+    ENDPOINT_ACTIONS = {
+        "/execute_codebase": lambda self, codebase, commit_id: self._process_startup_sh(codebase),
+        "/code_server": lambda self, codebase, commit_id: self._start_codeserver(codebase),
+        "/rollback_server": lambda self, codebase, commit_id: self._rollback_server(codebase, commit_id),
+        "/stop_process": lambda self, codebase, commit_id: self._stop_process(codebase),
+    }
+    COMMIT_ID_ENDPOINTS = ("/rollback_server",)
+
+    def __init__(self, db_session: Session, docker_manager: Optional[DockerManager] = None):
         self.db_session = db_session
-        self.docker_manager = DockerManager()
+        self.docker_manager = docker_manager or DockerManager()
 
-    async def process_startup_sh(self, dir_name: str):
-        """Processes and executes the startup.sh file content for a given directory."""
+    def _process_startup_sh(self, dir_name: str):
+        """Blocking implementation of process_startup_sh."""
         try:
             # Assuming startup.sh is at /app/codebases/{dir_name}/startup.sh
             # This command needs to be robust for various startup.sh contents.
@@ -26,31 +42,47 @@ class TaskManager:
         except Exception as e:
             raise Exception(f"Failed to execute startup script for {dir_name}: {e}")
 
-    async def start_codeserver(self, dir_name: str):
-        """Starts a code server for the specified directory."""
+    def _start_codeserver(self, dir_name: str):
+        """Blocking implementation of start_codeserver."""
         try:
             message = self.docker_manager.start_container(dir_name)
             return {"message": message}
         except Exception as e:
             raise Exception(f"Failed to start code server for {dir_name}: {e}")
 
-    async def rollback_server(self, dir_name: str, commit_id: str):
-        """Rollback the repository to a specific commit and restart the container."""
+    def _rollback_server(self, dir_name: str, commit_id: str):
+        """Blocking implementation of rollback_server."""
         try:
             message = self.docker_manager.rollback_repository(dir_name, commit_id)
             return {"message": message}
         except Exception as e:
             raise Exception(f"Failed to rollback server for {dir_name}: {e}")
 
-    async def stop_process(self, dir_name: str, ides: bool = False):
-        """Stops the process/server for the specified directory."""
+    def _stop_process(self, dir_name: str):
+        """Blocking implementation of stop_process."""
         try:
             message = self.docker_manager.stop_container(dir_name)
-            # 'ides' parameter is not currently used in docker_manager, but kept for API spec
             return {"message": message}
         except Exception as e:
             raise Exception(f"Failed to stop process for {dir_name}: {e}")
 
+    async def process_startup_sh(self, dir_name: str):
+        """Processes and executes the startup.sh file content for a given directory."""
+        return self._process_startup_sh(dir_name)
+
+    async def start_codeserver(self, dir_name: str):
+        """Starts a code server for the specified directory."""
+        return self._start_codeserver(dir_name)
+
+    async def rollback_server(self, dir_name: str, commit_id: str):
+        """Rollback the repository to a specific commit and restart the container."""
+        return self._rollback_server(dir_name, commit_id)
+
+    async def stop_process(self, dir_name: str, ides: bool = False):
+        """Stops the process/server for the specified directory."""
+        # 'ides' parameter is not currently used in docker_manager, but kept for API spec
+        return self._stop_process(dir_name)
+
     async def get_container_logs(self, dir_name: str):
         """Fetches logs from the Docker container associated with the directory."""
         try:
@@ -75,6 +107,15 @@ class TaskManager:
         except Exception as e:
             raise Exception(f"Failed to upload image file '{filename}': {e}")
 
+    def run_endpoint_sync(self, endpoint: str, codebase: str, commit_id: Optional[str] = None):
+        """Runs the blocking action behind a schedulable API endpoint for one codebase."""
+        action = self.ENDPOINT_ACTIONS.get(endpoint)
+        if action is None:
+            raise ValueError(f"Unknown API endpoint for task: {endpoint}")
+        if endpoint in self.COMMIT_ID_ENDPOINTS and not commit_id:
+            raise ValueError("Commit ID is required for rollback task.")
+        return action(self, codebase, commit_id)
+
     # --- Scheduled Task Management ---
     def add_scheduled_task(self, name: str, codebase: str, endpoint: str, schedule_time: datetime, commit_id: Optional[str] = None):
         """Adds a new task to the database and schedules it."""
@@ -137,18 +178,7 @@ class TaskManager:
             print(f"Executing scheduled task: {task.name} (ID: {task.id})")
 
             # Execute the corresponding API call
-            if task.endpoint == "/execute_codebase":
-                await self.process_startup_sh(task.codebase)
-            elif task.endpoint == "/code_server":
-                await self.start_codeserver(task.codebase)
-            elif task.endpoint == "/rollback_server":
-                if not task.commit_id:
-                    raise ValueError("Commit ID is required for rollback task.")
-                await self.rollback_server(task.codebase, task.commit_id)
-            elif task.endpoint == "/stop_process":
-                await self.stop_process(task.codebase)
-            else:
-                raise ValueError(f"Unknown API endpoint for task: {task.endpoint}")
+            await asyncio.to_thread(self.run_endpoint_sync, task.endpoint, task.codebase, task.commit_id)
 
             task.status = "completed"
             print(f"Scheduled task {task.name} (ID: {task.id}) completed successfully.")
@@ -162,3 +192,179 @@ class TaskManager:
             db_session_for_task.commit()
             db_session_for_task.close()
 
+    # --- Scheduled Pipeline Management ---
+    def _validate_pipeline_steps(self, steps: List[dict]):
+        """Checks pipeline steps up front so a bad definition fails at creation, not mid-deploy."""
+        if not steps:
+            raise ValueError("A pipeline needs at least one step.")
+        for index, step in enumerate(steps, start=1):
+            endpoint = step.get("endpoint")
+            if endpoint not in self.ENDPOINT_ACTIONS:
+                raise ValueError(f"Step {index}: unknown API endpoint '{endpoint}'.")
+            if not step.get("codebases"):
+                raise ValueError(f"Step {index}: at least one codebase is required.")
+            if endpoint in self.COMMIT_ID_ENDPOINTS and not step.get("commit_id"):
+                raise ValueError(f"Step {index}: commit ID is required for rollback step.")
+
+    def add_scheduled_pipeline(self, name: str, steps: List[dict], schedule_time: datetime):
+        """Adds a new pipeline to the database and schedules it as a single job."""
+        self._validate_pipeline_steps(steps)
+        db_pipeline = database.ScheduledPipeline(
+            name=name,
+            steps=json.dumps(steps),
+            schedule_time=schedule_time,
+            status="pending"
+        )
+        self.db_session.add(db_pipeline)
+        self.db_session.commit()
+        self.db_session.refresh(db_pipeline)
+
+        # The row must be committed before the job exists so the job can always find it;
+        # if scheduling fails, remove the row again rather than leave an unscheduled pipeline behind.
+        try:
+            job_id = scheduler.add_scheduled_job(
+                task_id=db_pipeline.id,
+                run_date=schedule_time,
+                task_func=PIPELINE_JOB_FUNC,
+                job_id=scheduler.pipeline_job_id(db_pipeline.id)
+            )
+            db_pipeline.job_id = job_id
+            self.db_session.add(db_pipeline)
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            scheduler.remove_scheduled_job(scheduler.pipeline_job_id(db_pipeline.id))
+            self.db_session.delete(db_pipeline)
+            self.db_session.commit()
+            raise
+        self.db_session.refresh(db_pipeline)
+
+        return db_pipeline
+
+    def get_scheduled_pipelines(self):
+        """Retrieves all scheduled pipelines from the database."""
+        return self.db_session.query(database.ScheduledPipeline).all()
+
+    def delete_scheduled_pipeline(self, pipeline_id: int):
+        """Deletes a scheduled pipeline from the database and the scheduler."""
+        db_pipeline = self.db_session.query(database.ScheduledPipeline).filter(database.ScheduledPipeline.id == pipeline_id).first()
+        if db_pipeline:
+            if db_pipeline.status == "running":
+                raise PipelineRunningError(f"Scheduled pipeline {pipeline_id} is running and cannot be deleted.")
+            if db_pipeline.job_id:
+                scheduler.remove_scheduled_job(db_pipeline.job_id)
+            self.db_session.delete(db_pipeline)
+            self.db_session.commit()
+            return True
+        return False
+
+    async def _run_pipeline_step(self, step: dict):
+        """Runs one pipeline step across all of its codebases in parallel."""
+        # Docker SDK calls block, so each codebase gets its own thread
+        results = await asyncio.gather(
+            *(
+                asyncio.to_thread(self.run_endpoint_sync, step["endpoint"], codebase, step.get("commit_id"))
+                for codebase in step["codebases"]
+            ),
+            return_exceptions=True
+        )
+        errors = [
+            f"{codebase}: {result}"
+            for codebase, result in zip(step["codebases"], results)
+            if isinstance(result, Exception)
+        ]
+        if errors:
+            raise Exception("; ".join(errors))
+
+    def _save_step_timings(self, db_session: Session, pipeline, step_timings: List[dict]):
+        """Persists the step timings recorded so far for a running pipeline."""
+        pipeline.step_timings = json.dumps(step_timings)
+        db_session.add(pipeline)
+        db_session.commit()
+
+    async def execute_scheduled_pipeline(self, pipeline_id: int):
+        """Executes a scheduled pipeline, starting each step as soon as the previous one succeeds."""
+        db = self.db_session
+        pipeline = None
+        step_timings = []
+        try:
+            pipeline = db.query(database.ScheduledPipeline).filter(database.ScheduledPipeline.id == pipeline_id).first()
+            if not pipeline:
+                print(f"Scheduled pipeline with ID {pipeline_id} not found. Skipping execution.")
+                return
+
+            pipeline.status = "running"
+            pipeline.last_run = datetime.now()
+            pipeline.run_count += 1
+            pipeline.step_timings = None
+            db.add(pipeline)
+            db.commit()
+            db.refresh(pipeline)
+
+            print(f"Executing scheduled pipeline: {pipeline.name} (ID: {pipeline.id})")
+
+            steps = json.loads(pipeline.steps)
+            failed = False
+            for step in steps:
+                timing = {"endpoint": step["endpoint"], "codebases": step["codebases"]}
+                step_timings.append(timing)
+                if failed:
+                    # Short-circuit: nothing after a failed step is run
+                    timing["status"] = "skipped"
+                    continue
+
+                timing["status"] = "running"
+                timing["started_at"] = datetime.now().isoformat()
+                self._save_step_timings(db, pipeline, step_timings)
+                start = time.perf_counter()
+                try:
+                    await self._run_pipeline_step(step)
+                    timing["status"] = "completed"
+                except Exception as e:
+                    timing["status"] = "failed"
+                    timing["error"] = str(e)
+                    failed = True
+                timing["duration_seconds"] = round(time.perf_counter() - start, 3)
+                # Commit after every step so progress is visible while the pipeline runs
+                self._save_step_timings(db, pipeline, step_timings)
+
+            if failed:
+                pipeline.status = "failed"
+                print(f"Scheduled pipeline {pipeline.name} (ID: {pipeline.id}) failed.")
+            else:
+                pipeline.status = "completed"
+                print(f"Scheduled pipeline {pipeline.name} (ID: {pipeline.id}) completed successfully.")
+
+        except (StaleDataError, ObjectDeletedError):
+            # The row was deleted underneath us; stop rather than run the remaining steps
+            print(f"Scheduled pipeline (ID: {pipeline_id}) was deleted while running. Stopping.")
+            db.rollback()
+            pipeline = None
+        except Exception as e:
+            print(f"Error executing scheduled pipeline (ID: {pipeline_id}): {e}")
+            db.rollback()
+            if pipeline:
+                pipeline.status = "failed"
+        finally:
+            if pipeline:
+                pipeline.step_timings = json.dumps(step_timings)
+                db.add(pipeline)
+                try:
+                    db.commit()
+                except (StaleDataError, ObjectDeletedError):
+                    print(f"Scheduled pipeline (ID: {pipeline_id}) was deleted while running.")
+                    db.rollback()
+
+
+# APScheduler persists jobs in the SQLAlchemy job store, so pipeline jobs reference this
+# module-level function by name instead of pickling a bound TaskManager method and its session.
+PIPELINE_JOB_FUNC = "app.task_manager:run_scheduled_pipeline"
+
+def run_scheduled_pipeline(pipeline_id: int):
+    """Scheduler entry point: runs a pipeline to completion on the scheduler's worker thread."""
+    db_session = database.SessionLocal() # New session for this job
+    try:
+        task_manager = TaskManager(db_session, DockerManager())
+        asyncio.run(task_manager.execute_scheduled_pipeline(pipeline_id))
+    finally:
+        db_session.close()
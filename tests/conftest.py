@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database before any app module reads settings
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+from app import database  # noqa: E402
+
+
+@pytest.fixture
+def db_session():
+    database.Base.metadata.drop_all(bind=database.engine)
+    database.init_db()
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,40 @@
+import threading
+
+
+class FakeDockerManager:
+    """
+    Stands in for DockerManager. Records calls and fails for codebases named in `failing`.
+
+    `barriers` maps an action ("rollback", "execute", "start", "stop") to a threading.Barrier;
+    each call for that action waits on it, so a step only succeeds if its codebases run concurrently.
+    """
+
+    BARRIER_TIMEOUT = 5
+
+    def __init__(self, failing=(), barriers=None):
+        self.failing = set(failing)
+        self.barriers = barriers or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _call(self, action: str, dir_name: str):
+        barrier = self.barriers.get(action)
+        if barrier is not None:
+            barrier.wait(timeout=self.BARRIER_TIMEOUT)
+        with self._lock:
+            self.calls.append((action, dir_name))
+        if dir_name in self.failing:
+            raise RuntimeError(f"{action} failed")
+        return f"{action} {dir_name}"
+
+    def execute_command(self, dir_name, command):
+        return self._call("execute", dir_name)
+
+    def start_container(self, dir_name):
+        return self._call("start", dir_name)
+
+    def rollback_repository(self, dir_name, commit_id):
+        return self._call("rollback", dir_name)
+
+    def stop_container(self, dir_name):
+        return self._call("stop", dir_name)
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import database, scheduler
+from app.main import app
+
+
+def _pipeline_payload(steps):
+    return {"name": "deploy", "schedule_time": (datetime.now() + timedelta(hours=1)).isoformat(), "steps": steps}
+
+
+def test_invalid_pipeline_returns_400(db_session):
+    client = TestClient(app)
+    response = client.post("/scheduled_pipelines", json=_pipeline_payload([{"endpoint": "/nope", "codebases": ["a"]}]))
+    assert response.status_code == 400
+    assert db_session.query(database.ScheduledPipeline).count() == 0
+
+
+def test_scheduling_error_returns_500_without_row(db_session, monkeypatch):
+    def broken_add(*args, **kwargs):
+        raise RuntimeError("job store unavailable")
+
+    monkeypatch.setattr(scheduler, "add_scheduled_job", broken_add)
+    client = TestClient(app)
+    response = client.post("/scheduled_pipelines", json=_pipeline_payload([{"endpoint": "/code_server", "codebases": ["a"]}]))
+    assert response.status_code == 500
+    assert "job store unavailable" in response.json()["detail"]
+    assert client.get("/scheduled_pipelines").json() == []
+
+
+def test_deleting_running_pipeline_returns_409(db_session):
+    pipeline = database.ScheduledPipeline(name="deploy", steps="[]", schedule_time=datetime.now(), status="running")
+    db_session.add(pipeline)
+    db_session.commit()
+
+    client = TestClient(app)
+    response = client.delete(f"/scheduled_pipelines/{pipeline.id}")
+    assert response.status_code == 409
+    assert client.get("/scheduled_pipelines").json()[0]["status"] == "running"
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import database, scheduler, task_manager
+from app.task_manager import PipelineRunningError, TaskManager
+from tests.fakes import FakeDockerManager
+
+DEPLOY_STEPS = [
+    {"endpoint": "/rollback_server", "codebases": ["a", "b", "c"], "commit_id": "abc123"},
+    {"endpoint": "/execute_codebase", "codebases": ["a", "b"]},
+    {"endpoint": "/code_server", "codebases": ["a"]},
+]
+
+
+def _add_pipeline_row(db_session, steps, **fields):
+    fields.setdefault("schedule_time", datetime.now())
+    pipeline = database.ScheduledPipeline(name="deploy", steps=json.dumps(steps), **fields)
+    db_session.add(pipeline)
+    db_session.commit()
+    return pipeline.id
+
+
+def _reload(db_session, pipeline_id):
+    db_session.expire_all()
+    return db_session.get(database.ScheduledPipeline, pipeline_id)
+
+
+@pytest.fixture
+def running_scheduler(db_session):
+    """Shuts the scheduler down after the test and clears its persistent job store."""
+    yield scheduler.scheduler
+    scheduler.scheduler.remove_all_jobs()
+    scheduler.shutdown_scheduler()
+
+
+@pytest.mark.parametrize("steps, message", [
+    ([], "at least one step"),
+    ([{"endpoint": "/nope", "codebases": ["a"]}], "unknown API endpoint"),
+    ([{"endpoint": "/code_server", "codebases": []}], "at least one codebase"),
+    ([{"endpoint": "/rollback_server", "codebases": ["a"]}], "commit ID is required"),
+])
+def test_invalid_steps_are_rejected_without_a_row(db_session, steps, message):
+    manager = TaskManager(db_session, FakeDockerManager())
+    with pytest.raises(ValueError, match=message):
+        manager.add_scheduled_pipeline("bad", steps, datetime.now() + timedelta(hours=1))
+    assert db_session.query(database.ScheduledPipeline).count() == 0
+
+
+def test_scheduling_failure_leaves_no_row(db_session, monkeypatch):
+    def broken_add(*args, **kwargs):
+        raise RuntimeError("job store unavailable")
+
+    monkeypatch.setattr(scheduler, "add_scheduled_job", broken_add)
+    manager = TaskManager(db_session, FakeDockerManager())
+    with pytest.raises(RuntimeError):
+        manager.add_scheduled_pipeline("deploy", DEPLOY_STEPS, datetime.now() + timedelta(hours=1))
+    assert db_session.query(database.ScheduledPipeline).count() == 0
+
+
+def test_steps_fan_out_in_parallel_and_record_timings(db_session):
+    # Each call waits until all codebases of its step have arrived, which only happens if they run concurrently
+    docker = FakeDockerManager(barriers={"rollback": threading.Barrier(3), "execute": threading.Barrier(2)})
+    pipeline_id = _add_pipeline_row(db_session, DEPLOY_STEPS)
+
+    asyncio.run(TaskManager(db_session, docker).execute_scheduled_pipeline(pipeline_id))
+
+    pipeline = _reload(db_session, pipeline_id)
+    timings = json.loads(pipeline.step_timings)
+    assert pipeline.status == "completed"
+    assert [t["status"] for t in timings] == ["completed"] * 3
+    assert all(t["duration_seconds"] >= 0 and t["started_at"] for t in timings)
+    # Every codebase of a step finishes before the next step starts
+    assert [action for action, _ in docker.calls] == ["rollback"] * 3 + ["execute"] * 2 + ["start"]
+
+
+def test_failed_step_short_circuits_the_rest(db_session):
+    docker = FakeDockerManager(failing={"b"})
+    pipeline_id = _add_pipeline_row(db_session, DEPLOY_STEPS)
+
+    asyncio.run(TaskManager(db_session, docker).execute_scheduled_pipeline(pipeline_id))
+
+    pipeline = _reload(db_session, pipeline_id)
+    timings = json.loads(pipeline.step_timings)
+    assert pipeline.status == "failed"
+    assert [t["status"] for t in timings] == ["failed", "skipped", "skipped"]
+    assert "b: Failed to rollback server for b" in timings[0]["error"]
+    assert all(action == "rollback" for action, _ in docker.calls)
+
+
+def test_timings_are_visible_while_running(db_session, monkeypatch):
+    pipeline_id = _add_pipeline_row(db_session, DEPLOY_STEPS[:2])
+    seen = []
+    manager = TaskManager(db_session, FakeDockerManager())
+    original = manager._run_pipeline_step
+
+    async def observing_step(step):
+        observer = database.SessionLocal()
+        try:
+            pipeline = observer.get(database.ScheduledPipeline, pipeline_id)
+            seen.append([t["status"] for t in json.loads(pipeline.step_timings)])
+        finally:
+            observer.close()
+        await original(step)
+
+    monkeypatch.setattr(manager, "_run_pipeline_step", observing_step)
+    asyncio.run(manager.execute_scheduled_pipeline(pipeline_id))
+
+    assert seen == [["running"], ["completed", "running"]]
+
+
+def test_running_pipeline_cannot_be_deleted(db_session):
+    pipeline_id = _add_pipeline_row(db_session, DEPLOY_STEPS, status="running")
+    with pytest.raises(PipelineRunningError):
+        TaskManager(db_session, FakeDockerManager()).delete_scheduled_pipeline(pipeline_id)
+    assert _reload(db_session, pipeline_id) is not None
+
+
+def test_pipeline_deleted_mid_run_stops_cleanly(db_session, monkeypatch):
+    docker = FakeDockerManager()
+    pipeline_id = _add_pipeline_row(db_session, DEPLOY_STEPS)
+    manager = TaskManager(db_session, docker)
+    original = manager._run_pipeline_step
+
+    async def deleting_step(step):
+        await original(step)
+        other = database.SessionLocal()
+        try:
+            other.delete(other.get(database.ScheduledPipeline, pipeline_id))
+            other.commit()
+        finally:
+            other.close()
+
+    monkeypatch.setattr(manager, "_run_pipeline_step", deleting_step)
+    asyncio.run(manager.execute_scheduled_pipeline(pipeline_id))
+
+    assert _reload(db_session, pipeline_id) is None
+    assert all(action == "rollback" for action, _ in docker.calls)
+
+
+def test_scheduled_pipeline_runs_when_job_fires(db_session, monkeypatch, running_scheduler):
+    docker = FakeDockerManager()
+    monkeypatch.setattr(task_manager, "DockerManager", lambda: docker)
+    manager = TaskManager(db_session, docker)
+    scheduler.start_scheduler(manager)
+
+    pipeline = manager.add_scheduled_pipeline("deploy", DEPLOY_STEPS, datetime.now() + timedelta(seconds=1))
+    assert pipeline.job_id == scheduler.pipeline_job_id(pipeline.id)
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        pipeline = _reload(db_session, pipeline.id)
+        if pipeline.status in ("completed", "failed"):
+            break
+        time.sleep(0.1)
+
+    assert pipeline.status == "completed"
+    assert [t["status"] for t in json.loads(pipeline.step_timings)] == ["completed"] * 3
+    assert len(docker.calls) == 6
+
+
+def test_restart_only_reschedules_future_pending_pipelines(db_session, running_scheduler):
+    past = datetime.now() - timedelta(hours=1)
+    future = datetime.now() + timedelta(hours=1)
+    failed_timings = json.dumps([{"endpoint": "/code_server", "codebases": ["a"], "status": "failed"}])
+    running_timings = json.dumps([
+        {"endpoint": "/rollback_server", "codebases": ["a"], "status": "completed"},
+        {"endpoint": "/code_server", "codebases": ["a"], "status": "running"},
+    ])
+    failed_id = _add_pipeline_row(db_session, DEPLOY_STEPS, schedule_time=past, status="failed", run_count=1, step_timings=failed_timings)
+    completed_id = _add_pipeline_row(db_session, DEPLOY_STEPS, schedule_time=past, status="completed", run_count=1)
+    missed_id = _add_pipeline_row(db_session, DEPLOY_STEPS, schedule_time=past, status="pending", job_id="pipeline-stale")
+    future_id = _add_pipeline_row(db_session, DEPLOY_STEPS, schedule_time=future, status="pending")
+    running_id = _add_pipeline_row(db_session, DEPLOY_STEPS, schedule_time=past, status="running", run_count=1, step_timings=running_timings)
+
+    scheduler.start_scheduler(TaskManager(db_session, FakeDockerManager()))
+
+    failed = _reload(db_session, failed_id)
+    assert (failed.status, failed.run_count, failed.step_timings, failed.job_id) == ("failed", 1, failed_timings, None)
+    assert _reload(db_session, completed_id).status == "completed"
+
+    missed = _reload(db_session, missed_id)
+    assert (missed.status, missed.job_id) == ("missed", None)
+
+    rescheduled = _reload(db_session, future_id)
+    assert rescheduled.status == "pending"
+    assert scheduler.scheduler.get_job(rescheduled.job_id) is not None
+
+    interrupted = _reload(db_session, running_id)
+    assert interrupted.status == "failed"
+    assert [t["status"] for t in json.loads(interrupted.step_timings)] == ["completed", "failed"]
+
+    assert [job.id for job in scheduler.scheduler.get_jobs()] == [scheduler.pipeline_job_id(future_id)]
@@ -0,0 +1,146 @@
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.staticfiles import StaticFiles
+from starlette.testclient import TestClient
+
+from app import main
+from app.static_files import PrecompressedStaticFiles, accepts_encoding, parse_accept_encoding
+
+HASHED_ASSET = "assets/index-AbC12_-9.js"
+ASSET_BODY = "console.log(1);" * 300
+INDEX_BODY = "<html>" + "x" * 2000 + "</html>"
+
+
+def _set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text(INDEX_BODY)
+    (tmp_path / HASHED_ASSET).write_text(ASSET_BODY)
+    (tmp_path / (HASHED_ASSET + ".br")).write_bytes(b"brotli-bytes")
+    # Prebuilt variants must not be older than their source
+    _set_mtime(tmp_path / HASHED_ASSET, 1_000_000)
+    _set_mtime(tmp_path / (HASHED_ASSET + ".br"), 1_000_000)
+    return tmp_path
+
+
+def _client(directory, **kwargs):
+    static_files = PrecompressedStaticFiles(directory=str(directory), html=True, **kwargs)
+    app = Starlette()
+    app.mount("/", static_files)
+    return TestClient(app), static_files
+
+
+@pytest.fixture
+def client(dist):
+    return _client(dist)[0]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", {"br": True, "gzip": True}),
+    ("gzip;q=1, br;q=0", {"br": False, "gzip": True}),
+    ("*", {"br": True, "gzip": True}),
+    ("*, br;q=0", {"br": False, "gzip": True}),
+    ("identity", {"br": False, "gzip": False}),
+    ("", {"br": False, "gzip": False}),
+])
+def test_accepts_encoding(header, expected):
+    qualities = parse_accept_encoding(header)
+    assert {name: accepts_encoding(qualities, name) for name in expected} == expected
+
+
+@pytest.mark.parametrize("header, encoding", [
+    ("gzip, br", "br"),
+    ("gzip, br;q=0", "gzip"),
+    ("*", "br"),
+    ("*, br;q=0", "gzip"),
+])
+def test_variant_is_chosen_by_accept_encoding(client, header, encoding):
+    response = client.get("/" + HASHED_ASSET, headers={"accept-encoding": header})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_hashed_asset_is_immutable_and_revalidates(client):
+    response = client.get("/" + HASHED_ASSET, headers={"accept-encoding": "br"})
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    revalidated = client.get("/" + HASHED_ASSET, headers={"accept-encoding": "br", "if-none-match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_index_is_not_cached_long_term(client):
+    response = client.get("/", headers={"accept-encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    assert "content-encoding" not in response.headers
+
+
+def test_changed_file_is_reloaded(dist, client):
+    first = client.get("/" + HASHED_ASSET, headers={"accept-encoding": "identity"})
+    (dist / HASHED_ASSET).write_text("console.log(2);" * 400)
+    _set_mtime(dist / HASHED_ASSET, 1_000_100)
+
+    second = client.get("/" + HASHED_ASSET, headers={"accept-encoding": "identity"})
+    assert second.text == "console.log(2);" * 400
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_gzip_is_generated_without_prebuilt_variant(client):
+    response = client.get("/", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == INDEX_BODY
+
+
+def test_prebuilt_variant_older_than_source_is_ignored(dist, client):
+    _set_mtime(dist / (HASHED_ASSET + ".br"), 999_000)
+    response = client.get("/" + HASHED_ASSET, headers={"accept-encoding": "br, gzip"})
+    # The stale .br is skipped in favour of gzip generated from the current source
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == ASSET_BODY
+
+
+def test_file_too_large_to_cache_keeps_headers_and_prebuilt_variant(dist):
+    client, static_files = _client(dist, max_cached_file_size=100)
+
+    response = client.get("/" + HASHED_ASSET, headers={"accept-encoding": "br"})
+    assert response.status_code == 200
+    assert response.content == b"brotli-bytes"
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert static_files.cache == {}
+
+    identity = client.get("/" + HASHED_ASSET, headers={"accept-encoding": "identity"})
+    assert identity.text == ASSET_BODY
+    assert identity.headers["etag"] != response.headers["etag"]
+
+    revalidated = client.get("/" + HASHED_ASSET, headers={"accept-encoding": "br", "if-none-match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_files_removed_by_a_rebuild_leave_the_cache(dist):
+    client, static_files = _client(dist)
+    client.get("/" + HASHED_ASSET)
+    old_asset = str(dist / HASHED_ASSET)
+    assert old_asset in static_files.cache
+
+    # Simulate a rebuild: the old hashed asset disappears and index.html changes
+    os.remove(dist / HASHED_ASSET)
+    (dist / "index.html").write_text(INDEX_BODY + "<!-- rebuilt -->")
+    client.get("/")
+    assert old_asset not in static_files.cache
+    assert client.get("/" + HASHED_ASSET).status_code == 404
+
+
+@pytest.mark.parametrize("enabled, expected_class", [(True, PrecompressedStaticFiles), (False, StaticFiles)])
+def test_frontend_precompressed_setting_selects_static_files(dist, monkeypatch, enabled, expected_class):
+    monkeypatch.setattr(main.settings, "FRONTEND_PRECOMPRESSED", enabled)
+    assert type(main.frontend_static_files(str(dist))) is expected_class
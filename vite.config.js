@@ -1,8 +1,14 @@
 import { defineConfig } from 'vite';
 import react from '@vitejs/plugin-react';
+import { compression } from 'vite-plugin-compression2';
 
 export default defineConfig({
-  plugins: [react()],
+  plugins: [
+    react(),
+    // Emit .gz and .br next to each asset; the backend picks one by Accept-Encoding
+    compression({ algorithm: 'gzip' }),
+    compression({ algorithm: 'brotliCompress' }),
+  ],
   // Project root is the current directory where vite.config.js is
   root: '.', 
   // Directory to serve static assets from during development